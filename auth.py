@@ -1,10 +1,15 @@
 from __future__ import annotations
 
+import base64
+import json
+import time
 from dataclasses import dataclass
-from typing import Any, Optional, Literal
+from typing import TYPE_CHECKING, Any, Optional, Literal
 
 import streamlit as st
-from st_supabase_connection import SupabaseConnection
+
+if TYPE_CHECKING:
+    from st_supabase_connection import SupabaseConnection
 
 
 # -----------------------------
@@ -14,9 +19,18 @@ from st_supabase_connection import SupabaseConnection
 # IMPORTANT: this must match your secrets.toml connection name: [connections.supabase]
 SUPABASE_CONN_NAME = "supabase"
 SESSION_KEY = "auth_session"
+USER_CACHE_KEY = "_auth_user_cached"
 
+# Treat a token as expired this many seconds early, to absorb clock skew.
+TOKEN_EXPIRY_SKEW_SECONDS = 30
+
+
+@st.cache_resource
+def _get_client() -> SupabaseConnection:
+    # Imported here: it pulls in supabase/httpx/postgrest, which only the
+    # first connection (cached for the process) actually needs.
+    from st_supabase_connection import SupabaseConnection
 
-def get_supabase() -> SupabaseConnection:
     return st.connection(
         name=SUPABASE_CONN_NAME,
         type=SupabaseConnection,
@@ -24,22 +38,50 @@ def get_supabase() -> SupabaseConnection:
     )
 
 
+def get_supabase() -> SupabaseConnection:
+    return _get_client()
+
+
 def _session_from_state() -> Optional[dict]:
     return st.session_state.get(SESSION_KEY)
 
 
 def _set_session(session: Optional[dict]) -> None:
+    # A new (or cleared) session invalidates the cached user.
+    st.session_state.pop(USER_CACHE_KEY, None)
     if session is None:
         st.session_state.pop(SESSION_KEY, None)
     else:
         st.session_state[SESSION_KEY] = session
 
 
+# -----------------------------
+# Response helpers
+# -----------------------------
+
+_SENTINEL = object()
+
+
+def _field(obj: Any, name: str) -> Any:
+    """Read `name` from a supabase response object or a plain dict."""
+    if obj.__class__ is dict:
+        return obj.get(name)
+    return getattr(obj, name, None) or (obj.get(name) if isinstance(obj, dict) else None)
+
+
+def _as_dict(obj: Any) -> dict:
+    """Plain dict for a dict or a pydantic-style model with .dict(); {} otherwise."""
+    if isinstance(obj, dict):
+        return obj
+    to_dict = getattr(obj, "dict", _SENTINEL)
+    return (to_dict() or {}) if to_dict is not _SENTINEL else {}
+
+
 # -----------------------------
 # User model
 # -----------------------------
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class AuthUser:
     id: str
     email: Optional[str] = None
@@ -50,18 +92,26 @@ def _to_auth_user(user_obj: Any) -> Optional[AuthUser]:
     if not user_obj:
         return None
 
-    user_id = getattr(user_obj, "id", None) or (
-        user_obj.get("id") if isinstance(user_obj, dict) else None
-    )
-    email = getattr(user_obj, "email", None) or (
-        user_obj.get("email") if isinstance(user_obj, dict) else None
-    )
+    user_id = _field(user_obj, "id")
+    email = _field(user_obj, "email")
 
     if not user_id:
         return None
 
-    raw = user_obj if isinstance(user_obj, dict) else getattr(user_obj, "dict", lambda: None)()
-    return AuthUser(id=user_id, email=email, raw=raw)
+    return AuthUser(id=user_id, email=email, raw=_as_dict(user_obj) or None)
+
+
+def _token_expiry(access_token: str) -> Optional[float]:
+    """
+    `exp` claim of a JWT, read locally (no signature check: the token came
+    from Supabase and is only used to decide whether to call it again).
+    """
+    try:
+        payload = access_token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except Exception:
+        return None
 
 
 # -----------------------------
@@ -69,27 +119,56 @@ def _to_auth_user(user_obj: Any) -> Optional[AuthUser]:
 # -----------------------------
 
 def current_user() -> Optional[AuthUser]:
-    supabase = get_supabase()
     sess = _session_from_state()
     if not sess:
         return None
 
-    # Re-hydrate auth client (best-effort)
+    supabase = get_supabase()
+    access_token = sess.get("access_token")
+    refresh_token = sess.get("refresh_token")
+
+    # Same, still-valid token as last time: skip the round-trips to Supabase.
+    # Data queries still go through the shared client, so its PostgREST
+    # header is pointed at this session's token (local, no request).
+    cached = st.session_state.get(USER_CACHE_KEY)
+    if cached and access_token and cached[0] == access_token:
+        exp = _token_expiry(access_token)
+        if exp is not None and exp > time.time() + TOKEN_EXPIRY_SKEW_SECONDS:
+            supabase.client.postgrest.auth(access_token)
+            return cached[1]
+
+    # The client is shared by every session in the process, so its auth
+    # state is whoever set it last: re-hydrate with this session's tokens
+    # before every lookup. set_session refreshes an expired token and
+    # returns the user, so keep what it hands back.
+    res = None
     try:
-        access_token = sess.get("access_token")
-        refresh_token = sess.get("refresh_token")
         if access_token and refresh_token:
-            supabase.auth.set_session(access_token, refresh_token)
+            res = supabase.auth.set_session(access_token, refresh_token)
     except Exception:
         pass
 
+    new_session = _as_dict(_field(res, "session")) if res else {}
+    if new_session.get("access_token"):
+        st.session_state[SESSION_KEY] = new_session
+        access_token = new_session["access_token"]
+
     try:
-        res = supabase.auth.get_user()
-        user_obj = getattr(res, "user", None) or (res.get("user") if isinstance(res, dict) else None) or res
-        return _to_auth_user(user_obj)
+        user_obj = _field(res, "user") if res else None
+        if not user_obj and access_token:
+            # Ask about this session's token explicitly, not the shared client's
+            got = supabase.auth.get_user(access_token)
+            user_obj = _field(got, "user") or got
+        user = _to_auth_user(user_obj)
     except Exception:
         return None
 
+    if user and access_token:
+        # Even if set_session failed, data queries must carry this session's JWT
+        supabase.client.postgrest.auth(access_token)
+        st.session_state[USER_CACHE_KEY] = (access_token, user)
+    return user
+
 
 SignUpOutcome = Literal["SIGNED_IN", "NEEDS_EMAIL_CONFIRMATION"]
 
@@ -105,14 +184,10 @@ def sign_up_email_password(email: str, password: str) -> SignUpOutcome:
     res = supabase.auth.sign_up({"email": email, "password": password})
 
     # If email confirmation is ON, GoTrue typically returns user but NO session.
-    session_obj = getattr(res, "session", None) or (res.get("session") if isinstance(res, dict) else None)
+    session_obj = _field(res, "session")
 
     if session_obj:
-        if isinstance(session_obj, dict):
-            sess = session_obj
-        else:
-            sess = getattr(session_obj, "dict", lambda: None)() or {}
-        _set_session(sess)
+        _set_session(_as_dict(session_obj))
         return "SIGNED_IN"
 
     return "NEEDS_EMAIL_CONFIRMATION"
@@ -122,16 +197,11 @@ def sign_in_email_password(email: str, password: str) -> None:
     supabase = get_supabase()
     res = supabase.auth.sign_in_with_password({"email": email, "password": password})
 
-    session_obj = getattr(res, "session", None) or (res.get("session") if isinstance(res, dict) else None)
+    session_obj = _field(res, "session")
     if not session_obj:
         raise RuntimeError("No session returned from sign-in.")
 
-    if isinstance(session_obj, dict):
-        sess = session_obj
-    else:
-        sess = getattr(session_obj, "dict", lambda: None)() or {}
-
-    _set_session(sess)
+    _set_session(_as_dict(session_obj))
 
 
 def sign_in_oauth(provider: str, redirect_to: Optional[str] = None) -> None:
@@ -142,7 +212,7 @@ def sign_in_oauth(provider: str, redirect_to: Optional[str] = None) -> None:
     res = supabase.auth.sign_in_with_oauth(
         {"provider": provider, "options": {"redirect_to": redirect}}
     )
-    url = getattr(res, "url", None) or (res.get("url") if isinstance(res, dict) else None)
+    url = _field(res, "url")
     if not url:
         raise RuntimeError("OAuth did not return a redirect URL.")
 
@@ -1,11 +1,22 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from bisect import bisect_right
+from calendar import isleap
+from dataclasses import dataclass, field
 from datetime import date, timedelta
-from dateutil.relativedelta import relativedelta
-from typing import List, Optional
+from functools import lru_cache
+from typing import List, Optional, Union
 
+import numpy as np
 
-@dataclass
+# date(1970, 1, 1).toordinal(): datetime64[D] values count days from here
+EPOCH_ORD = 719163
+
+# Date ordinals (and day counts) stored in arrays: every date this app
+# handles is around 7.4e5, well inside int32, so arrays are half the width
+ORD_DTYPE = np.int32
+
+
+@dataclass(slots=True)
 class Trip:
     """
     Represents a trip outside the UK.
@@ -16,25 +27,42 @@ class Trip:
 
     Home Office rule: only whole days away count as absences.
     Departure and arrival days do NOT count.
+
+    abs_start / abs_end: first and last full absence day (start + 1, end - 1),
+    computed once at construction; abs_end < abs_start means no full days.
     """
     start: date
     end: date
     note: str = ""
+    abs_start: date = field(init=False, repr=False, compare=False)
+    abs_end: date = field(init=False, repr=False, compare=False)
+    _full_absence_days: int = field(init=False, repr=False, compare=False)
 
     def __post_init__(self):
         if self.end < self.start:
             raise ValueError("Trip end date cannot be before start date.")
+        self.abs_start = self.start + timedelta(days=1)
+        self.abs_end = self.end - timedelta(days=1)
+        self._full_absence_days = max(0, (self.end - self.start).days - 1)
 
     def full_absence_days(self) -> int:
         """
         Number of full absence days for this trip, i.e.
         days between (start + 1) and (end - 1), inclusive.
         """
-        abs_start = self.start + timedelta(days=1)
-        abs_end = self.end - timedelta(days=1)
-        if abs_end < abs_start:
-            return 0
-        return (abs_end - abs_start).days + 1
+        return self._full_absence_days
+
+
+def _shift_years(d: date, years: int) -> date:
+    """
+    Move d by whole calendar years (negative = back in time).
+    29 Feb lands on 28 Feb in non-leap years, same as relativedelta(years=...),
+    but as a plain date.replace() instead of relativedelta arithmetic.
+    """
+    year = d.year + years
+    if d.month == 2 and d.day == 29 and not isleap(year):
+        return d.replace(year=year, day=28)
+    return d.replace(year=year)
 
 
 def _overlap(a_start: date, a_end: date, b_start: date, b_end: date) -> Optional[tuple[date, date]]:
@@ -58,13 +86,12 @@ def count_absent_days(trips: List[Trip], window_start: date, window_end: date) -
 
     total = 0
     for trip in trips:
-        trip_abs_start = trip.start + timedelta(days=1)
-        trip_abs_end = trip.end - timedelta(days=1)
-
-        if trip_abs_end < trip_abs_start:
+        if trip.abs_start > window_end or trip.abs_end < window_start:
+            continue  # entirely outside the window
+        if trip.abs_end < trip.abs_start:
             continue  # no full absence days
 
-        overlap = _overlap(window_start, window_end, trip_abs_start, trip_abs_end)
+        overlap = _overlap(window_start, window_end, trip.abs_start, trip.abs_end)
         if overlap:
             o_start, o_end = overlap
             total += (o_end - o_start).days + 1
@@ -75,14 +102,92 @@ def count_absent_days(trips: List[Trip], window_start: date, window_end: date) -
 def is_full_absence_day(trips: List[Trip], d: date) -> bool:
     """Return True if d is a full absence day for any trip."""
     for trip in trips:
-        abs_start = trip.start + timedelta(days=1)
-        abs_end = trip.end - timedelta(days=1)
-        if abs_start <= d <= abs_end:
+        if trip.abs_start <= d <= trip.abs_end:
             return True
     return False
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
+class TripArray:
+    """
+    Trips stored column-wise as date ordinals (date.toordinal()):
+    starts_ord[i] / ends_ord[i] are the LEFT / RETURNED dates of trip i.
+
+    Window counts over these arrays are a handful of vectorized NumPy ops
+    instead of a Python loop over Trip objects; build once, reuse per rerun.
+    """
+    starts_ord: np.ndarray
+    ends_ord: np.ndarray
+
+    @classmethod
+    def from_trips(cls, trips: List[Trip]) -> "TripArray":
+        n = len(trips)
+        return cls(
+            starts_ord=np.fromiter((t.start.toordinal() for t in trips), dtype=ORD_DTYPE, count=n),
+            ends_ord=np.fromiter((t.end.toordinal() for t in trips), dtype=ORD_DTYPE, count=n),
+        )
+
+    def __len__(self) -> int:
+        return len(self.starts_ord)
+
+    def full_absence_days(self) -> np.ndarray:
+        """Trip.full_absence_days() for every trip at once."""
+        return np.maximum(0, self.ends_ord - self.starts_ord - 1)
+
+
+def _as_trip_array(trips: Union[List[Trip], TripArray]) -> TripArray:
+    return trips if isinstance(trips, TripArray) else TripArray.from_trips(trips)
+
+
+def _absence_days_windows(
+    first_abs: np.ndarray, last_abs: np.ndarray, los: np.ndarray, hi: int
+) -> np.ndarray:
+    """
+    Full absence days inside each ordinal window [los[k], hi] inclusive,
+    summed over trips, for several windows sharing one right edge in a
+    single broadcast pass. Trips are given by their full absence range
+    [first_abs, last_abs] = [start + 1, end - 1].
+    """
+    overlap = np.minimum(last_abs, hi) - np.maximum(first_abs, los[:, None]) + 1
+    return np.maximum(0, overlap).sum(axis=1)
+
+
+@dataclass(slots=True)
+class _TripIndex:
+    """
+    Full absence ranges (as ordinals) merged - overlapping or back-to-back
+    trips become one run - and sorted by start, so finding the end of the
+    run a day falls in is a bisect instead of a scan.
+    """
+    starts: List[int]
+    ends: List[int]
+
+    @classmethod
+    def from_trips(cls, trips: TripArray) -> "_TripIndex":
+        starts: List[int] = []
+        ends: List[int] = []
+        ranges = sorted(
+            (s + 1, e - 1)
+            for s, e in zip(trips.starts_ord.tolist(), trips.ends_ord.tolist())
+            if e - s > 1
+        )
+        for abs_start, abs_end in ranges:
+            if ends and abs_start <= ends[-1] + 1:
+                ends[-1] = max(ends[-1], abs_end)
+            else:
+                starts.append(abs_start)
+                ends.append(abs_end)
+        return cls(starts=starts, ends=ends)
+
+    def absence_end(self, d: int) -> Optional[int]:
+        """Last day of the absence run containing ordinal d, or None if d is not absent."""
+        i = bisect_right(self.starts, d) - 1
+        if i >= 0 and d <= self.ends[i]:
+            return self.ends[i]
+        return None
+
+
+@dataclass(slots=True)
 class CandidateCheckResult:
     candidate_date: date
     days_12_months: int
@@ -95,7 +200,7 @@ class CandidateCheckResult:
 
 
 def check_candidate_date(
-    trips: List[Trip],
+    trips: Union[List[Trip], TripArray],
     candidate_date: date,
     max_12_month_absences: int = 90,
     max_5_year_absences: int = 450,
@@ -112,22 +217,26 @@ def check_candidate_date(
 
         presence_date = candidate_date - 5 years + 1 day
     """
+    arr = _as_trip_array(trips)
+    # Each trip's full absence days are [start + 1, end - 1]
+    first_abs, last_abs = arr.starts_ord + 1, arr.ends_ord - 1
 
     # 12-month window: [candidate_date - 1y, candidate_date - 1 day]
-    start_12m = candidate_date - relativedelta(years=1)
-    end_12m = candidate_date - timedelta(days=1)
+    start_12m = _shift_years(candidate_date, -1)
 
     # 5-year window for absences: [candidate_date - 5y, candidate_date - 1 day]
-    start_5y = candidate_date - relativedelta(years=5)
-    end_5y = candidate_date - timedelta(days=1)
+    start_5y = _shift_years(candidate_date, -5)
 
-    days_12m = count_absent_days(trips, start_12m, end_12m)
-    days_5y = count_absent_days(trips, start_5y, end_5y)
+    # Both windows end the day before the candidate: count them in one pass
+    end_ord = candidate_date.toordinal() - 1
+    los = np.array([start_12m.toordinal(), start_5y.toordinal()])
+    days_12m, days_5y = _absence_days_windows(first_abs, last_abs, los, end_ord).tolist()
 
     # Presence date as per Home Office example: -5 years + 1 day
     presence_date = start_5y + timedelta(days=1)
 
-    present_on_presence_date = not is_full_absence_day(trips, presence_date)
+    p = presence_date.toordinal()
+    present_on_presence_date = not bool(np.any((first_abs <= p) & (p <= last_abs)))
 
     meets_12m = days_12m <= max_12_month_absences
     meets_5y = days_5y <= max_5_year_absences
@@ -146,33 +255,166 @@ def check_candidate_date(
     )
 
 
+def _shift_years_ord(ords: np.ndarray, years: int) -> np.ndarray:
+    """
+    _shift_years() for an array of ordinals at once: same month/day in the
+    target year, with 29 Feb clamped to 28 Feb where needed.
+    """
+    days = (ords - EPOCH_ORD).astype("datetime64[D]")
+    months = days.astype("datetime64[M]")
+    day_of_month = (days - months.astype("datetime64[D]")).astype(np.int64)
+
+    target = months + np.timedelta64(12 * years, "M")
+    target_start = target.astype("datetime64[D]")
+    month_len = ((target + 1).astype("datetime64[D]") - target_start).astype(np.int64)
+
+    shifted = target_start + np.minimum(day_of_month, month_len - 1)
+    return (shifted.astype(np.int64) + EPOCH_ORD).astype(ORD_DTYPE)
+
+
+@lru_cache(maxsize=32)
+def _window_starts(first_ord: int, last_ord: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    12-month and 5-year window starts for every candidate ordinal in
+    [first_ord, last_ord]. They depend only on the dates, not the trips, so
+    they are shared between calls (read-only).
+    """
+    candidates = np.arange(first_ord, last_ord + 1, dtype=ORD_DTYPE)
+    start_12m = _shift_years_ord(candidates, -1)
+    start_5y = _shift_years_ord(candidates, -5)
+    start_12m.flags.writeable = False
+    start_5y.flags.writeable = False
+    return start_12m, start_5y
+
+
+def _build_absence_prefix(trips: TripArray, h0: int, h1: int) -> np.ndarray:
+    """
+    Prefix sums of full absence days over the ordinal horizon [h0, h1].
+
+    prefix[i] = absence days strictly before day h0 + i, so a window [a, b]
+    of day offsets holds prefix[b + 1] - prefix[a] absence days.
+    Overlapping trips add up, exactly like count_absent_days.
+    """
+    n_days = h1 - h0 + 1
+
+    # Day offsets of each trip's absence range, clipped to the horizon
+    lo = np.maximum(trips.starts_ord + 1, h0) - h0
+    hi = np.minimum(trips.ends_ord - 1, h1) - h0
+    keep = lo <= hi
+
+    # +1 / -1 at range edges, shifted by one so arr[i + 1] is day i's count
+    edges = np.bincount(lo[keep] + 1, minlength=n_days + 2)
+    edges -= np.bincount(hi[keep] + 2, minlength=n_days + 2)
+    arr = np.cumsum(edges[: n_days + 1])
+    return np.cumsum(arr).astype(ORD_DTYPE)
+
+
+def _find_earliest_kernel(
+    trips: TripArray,
+    today_ord: int,
+    max_ord: int,
+    max_12_month_absences: int,
+    max_5_year_absences: int,
+) -> Optional[int]:
+    """
+    Earliest candidate ordinal in [today_ord, max_ord] that meets all three
+    rules, or None.
+
+    Integer-only search: the 12-month / 5-year window starts of every
+    candidate are precomputed as arrays, so the loop never builds a date.
+    Rather than stepping one day at a time, each failing rule tells us the
+    earliest candidate that could pass it, and we jump straight there:
+    - a window `excess` days over its limit must first drop at least that
+      many absence days off its left edge (its right edge only ever adds
+      days, so nothing earlier can bring it back under)
+    - an absent presence date (window start + 1) must first move past the
+      end of the absence run it falls in
+    Both window starts are non-decreasing in the candidate, so each jump is
+    a searchsorted and never skips an eligible date.
+    """
+    start_12m, start_5y = _window_starts(today_ord, max_ord)
+
+    # Every window and presence date we look at falls inside [h0, max_ord];
+    # from here on, days are offsets from h0
+    h0 = int(start_5y[0])
+    prefix = _build_absence_prefix(trips, h0, max_ord)
+    start_12m = start_12m - h0
+    start_5y = start_5y - h0
+    today_off = today_ord - h0
+
+    # Merged absence runs, for the presence-date jump
+    index = _TripIndex.from_trips(trips)
+
+    i = 0
+    n = max_ord - today_ord + 1
+    while i < n:
+        # Windows end the day before the candidate: prefix[end] covers that
+        end = today_off + i
+        a12 = start_12m[i]
+        a5 = start_5y[i]
+        presence = a5 + 1
+
+        meets_12m = prefix[end] - prefix[a12] <= max_12_month_absences
+        meets_5y = prefix[end] - prefix[a5] <= max_5_year_absences
+        present = prefix[presence + 1] == prefix[presence]
+
+        if meets_12m and meets_5y and present:
+            return today_ord + i
+
+        next_i = i + 1
+        if not meets_12m:
+            excess = prefix[end] - prefix[a12] - max_12_month_absences
+            lo = int(np.searchsorted(prefix, prefix[a12] + excess, side="left"))
+            next_i = max(next_i, int(np.searchsorted(start_12m, lo, side="left")))
+        if not meets_5y:
+            excess = prefix[end] - prefix[a5] - max_5_year_absences
+            lo = int(np.searchsorted(prefix, prefix[a5] + excess, side="left"))
+            next_i = max(next_i, int(np.searchsorted(start_5y, lo, side="left")))
+        if not present:
+            run_end = index.absence_end(h0 + int(presence)) - h0
+            next_i = max(next_i, int(np.searchsorted(start_5y, run_end, side="left")))
+        i = next_i
+
+    return None
+
+
 def find_earliest_application_date(
-    trips: List[Trip],
+    trips: Union[List[Trip], TripArray],
     today: date,
     search_years: int = 10,
     max_12_month_absences: int = 90,
     max_5_year_absences: int = 450,
 ) -> Optional[CandidateCheckResult]:
     """
-    Scan forward day-by-day from 'today' up to 'today + search_years'
+    Search forward from 'today' up to 'today + search_years'
     to find the first day that meets:
     - 12-month rule
     - 5-year rule
     - presence on the Home Office "5 years ago" test date
     """
-    max_date = today + relativedelta(years=search_years)
-    current = today
-
-    while current <= max_date:
-        result = check_candidate_date(
-            trips,
-            current,
-            max_12_month_absences,
-            max_5_year_absences,
-        )
-        if result.fully_eligible:
-            return result
-
-        current += timedelta(days=1)
+    trips = _as_trip_array(trips)
+
+    # Often already eligible today: one check, before building any of the
+    # per-day search arrays
+    result = check_candidate_date(trips, today, max_12_month_absences, max_5_year_absences)
+    if result.fully_eligible:
+        return result
+
+    max_date = _shift_years(today, search_years)
+
+    found = _find_earliest_kernel(
+        trips,
+        today.toordinal(),
+        max_date.toordinal(),
+        max_12_month_absences,
+        max_5_year_absences,
+    )
+    if found is None:
+        return None
 
-    return None
+    return check_candidate_date(
+        trips,
+        date.fromordinal(found),
+        max_12_month_absences,
+        max_5_year_absences,
+    )
@@ -1,7 +1,12 @@
 from __future__ import annotations
 
 from datetime import date
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+import streamlit as st
+
+# Columns read by models.rows_to_arrays; add new ones here when it needs them.
+TRIP_COLUMNS = "id,start_date,end_date,note"
 
 
 def _extract_data(res: Any) -> List[Dict[str, Any]]:
@@ -22,18 +27,75 @@ def fetch_trips(supabase, user_id: str) -> List[Dict[str, Any]]:
     """
     Fetch trips for one user (newest first).
     """
+    if not user_id:
+        raise ValueError("user_id is required to fetch trips.")
+
     q = (
         supabase.table("trips")
-        .select("*")
+        .select(TRIP_COLUMNS)
         .eq("user_id", user_id)
         .order("start_date", desc=True)
     )
 
-    try:
-        res = q.execute()
-    except Exception:
-        res = q
+    res = q.execute()
+    return _extract_data(res)
+
+
+@st.cache_resource
+def _trip_versions() -> Dict[str, int]:
+    """
+    Per-user write counter, shared by every session in this process.
+    insert_trip / delete_trips bump it, which moves fetch_trips_cached onto
+    a fresh cache key for that user only.
+    """
+    return {}
+
+
+def bump_trips_version(user_id: str) -> None:
+    versions = _trip_versions()
+    versions[user_id] = versions.get(user_id, 0) + 1
+
+
+@st.cache_data(ttl=300, max_entries=1000, show_spinner=False)
+def _fetch_trips_versioned(_supabase, user_id: str, version: int) -> List[Dict[str, Any]]:
+    # The client is not hashed; (user_id, version) is the cache key.
+    return fetch_trips(_supabase, user_id=user_id)
+
+
+def fetch_trips_cached(supabase, user_id: str) -> List[Dict[str, Any]]:
+    """
+    fetch_trips served from st.cache_data until this user's trips change.
+    """
+    return _fetch_trips_versioned(supabase, user_id, _trip_versions().get(user_id, 0))
+
+
+def insert_trips(
+    supabase,
+    trips: List[Tuple[date, date, str]],
+    user_id: str,
+) -> List[Dict[str, Any]]:
+    """
+    Insert several (start, end, note) trips in one request, for one user.
+    Returns the inserted rows (with their new ids), so callers can update
+    local state without fetching the table again.
+    """
+    if not user_id:
+        raise ValueError("user_id is required to insert a trip.")
+    if not trips:
+        return []
 
+    payload: List[Dict[str, Any]] = [
+        {
+            "user_id": user_id,
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+            "note": note or None,
+        }
+        for start, end, note in trips
+    ]
+
+    res = supabase.table("trips").insert(payload).execute()
+    bump_trips_version(user_id)
     return _extract_data(res)
 
 
@@ -47,35 +109,27 @@ def insert_trip(
     """
     Insert one trip for one user.
     """
-    if not user_id:
-        raise ValueError("user_id is required to insert a trip.")
-
-    payload: Dict[str, Any] = {
-        "user_id": user_id,
-        "start_date": start.isoformat(),
-        "end_date": end.isoformat(),
-        "note": note or None,
-    }
-
-    try:
-        res = supabase.table("trips").insert(payload).execute()
-    except Exception:
-        res = supabase.table("trips").insert(payload)
-
-    data = _extract_data(res)
+    data = insert_trips(supabase, [(start, end, note)], user_id=user_id)
     return data[0] if data else {}
 
 
-def delete_trip(supabase, trip_id: int, user_id: str) -> None:
+def delete_trips(supabase, trip_ids: List[int], user_id: str) -> None:
     """
-    Delete one trip, scoped to the user.
+    Delete several trips in one request, scoped to the user.
     """
     if not user_id:
         raise ValueError("user_id is required to delete a trip.")
+    if not trip_ids:
+        return
+
+    q = supabase.table("trips").delete().in_("id", list(trip_ids)).eq("user_id", user_id)
+
+    q.execute()
+    bump_trips_version(user_id)
 
-    q = supabase.table("trips").delete().eq("id", trip_id).eq("user_id", user_id)
 
-    try:
-        q.execute()
-    except Exception:
-        q
\ No newline at end of file
+def delete_trip(supabase, trip_id: int, user_id: str) -> None:
+    """
+    Delete one trip, scoped to the user.
+    """
+    delete_trips(supabase, [trip_id], user_id=user_id)
@@ -2,28 +2,92 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import date
-from typing import Any, Dict, Optional
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List
 
-from calculator import Trip
+import numpy as np
 
+from calculator import EPOCH_ORD, ORD_DTYPE, TripArray
 
-@dataclass(frozen=True)
-class TripRow:
+
+# Built from db.TRIP_COLUMNS only ("id,start_date,end_date,note"): reading
+# another column here means adding it to that projection too.
+@dataclass(frozen=True, slots=True)
+class TripTable:
     """
-    What we keep in session_state for UI:
-    - id: Supabase row id (needed for delete)
-    - trip: your existing Trip model (used by calculator)
+    What we keep in session_state for UI, one column per field and one
+    entry per trip, newest start first (same order as db.fetch_trips):
+    - ids: Supabase row ids (needed for delete)
+    - trips: start/end ordinals (used by calculator)
+    - notes: cleaned note per trip ("" if none)
+    - start_labels / end_labels: format_date_uk text, built once per load
     """
-    id: int
-    trip: Trip
-
-
-def row_to_triprow(row: Dict[str, Any]) -> TripRow:
-    return TripRow(
-        id=int(row["id"]),
-        trip=Trip(
-            start=date.fromisoformat(row["start_date"]),
-            end=date.fromisoformat(row["end_date"]),
-            note=(row.get("note") or "").strip(),
-        ),
-    )
\ No newline at end of file
+    ids: np.ndarray
+    trips: TripArray
+    notes: List[str]
+    start_labels: List[str]
+    end_labels: List[str]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def without(self, trip_ids: Iterable[int]) -> TripTable:
+        """Copy with the given row ids removed (order preserved)."""
+        keep = ~np.isin(self.ids, list(trip_ids))
+        mask = keep.tolist()
+        return TripTable(
+            ids=self.ids[keep],
+            trips=TripArray(
+                starts_ord=self.trips.starts_ord[keep],
+                ends_ord=self.trips.ends_ord[keep],
+            ),
+            notes=[n for n, k in zip(self.notes, mask) if k],
+            start_labels=[s for s, k in zip(self.start_labels, mask) if k],
+            end_labels=[e for e, k in zip(self.end_labels, mask) if k],
+        )
+
+    def with_row(self, row: Dict[str, Any]) -> TripTable:
+        """Copy with one DB row added at its newest-first position."""
+        new = rows_to_arrays([row])
+        starts = self.trips.starts_ord
+        i = int(np.searchsorted(-starts, -new.trips.starts_ord[0], side="right"))
+        return TripTable(
+            ids=np.insert(self.ids, i, new.ids[0]),
+            trips=TripArray(
+                starts_ord=np.insert(starts, i, new.trips.starts_ord[0]),
+                ends_ord=np.insert(self.trips.ends_ord, i, new.trips.ends_ord[0]),
+            ),
+            notes=self.notes[:i] + new.notes + self.notes[i:],
+            start_labels=self.start_labels[:i] + new.start_labels + self.start_labels[i:],
+            end_labels=self.end_labels[:i] + new.end_labels + self.end_labels[i:],
+        )
+
+
+def _iso_to_ordinals(values: List[str]) -> np.ndarray:
+    # NumPy parses the whole ISO column in C, straight to day counts
+    days = np.array(values, dtype="datetime64[D]").astype(np.int64)
+    return (days + EPOCH_ORD).astype(ORD_DTYPE)
+
+
+def rows_to_arrays(rows: List[Dict[str, Any]]) -> TripTable:
+    """Turn fetch_trips / insert_trip rows into a TripTable in one pass."""
+    starts_ord = _iso_to_ordinals([r["start_date"] for r in rows])
+    ends_ord = _iso_to_ordinals([r["end_date"] for r in rows])
+    return TripTable(
+        ids=np.array([r["id"] for r in rows], dtype=np.int64),
+        trips=TripArray(starts_ord=starts_ord, ends_ord=ends_ord),
+        notes=[(r.get("note") or "").strip() for r in rows],
+        start_labels=[format_date_ord(o) for o in starts_ord.tolist()],
+        end_labels=[format_date_ord(o) for o in ends_ord.tolist()],
+    )
+
+
+@lru_cache(maxsize=4096)
+def format_date_ord(o: int) -> str:
+    """Format a date ordinal with weekday in UK style."""
+    return date.fromordinal(o).strftime("%A %d/%m/%Y")
+
+
+def format_date_uk(d: date) -> str:
+    """Format date with weekday in UK style."""
+    return format_date_ord(d.toordinal())
@@ -1,13 +1,14 @@
 import re
 from datetime import date
 
+import pandas as pd
 import streamlit as st
-from st_supabase_connection import SupabaseConnection, execute_query
 
 from calculator import find_earliest_application_date, check_candidate_date
-from db import fetch_trips, insert_trip, delete_trip
-from models import row_to_triprow
+from db import bump_trips_version, fetch_trips, fetch_trips_cached, insert_trip, delete_trips
+from models import format_date_uk, rows_to_arrays
 from auth import (
+    get_supabase,
     handle_oauth_callback,
     current_user,
     sign_in_email_password,
@@ -20,11 +21,6 @@ from auth import (
 SHOW_DEV_DETAILS = bool(st.secrets.get("SHOW_DEV_DETAILS", False))
 
 
-def format_date_uk(d: date) -> str:
-    """Format date with weekday in UK style."""
-    return d.strftime("%A %d/%m/%Y")
-
-
 # -------------------------
 # PAGE CONFIG
 # -------------------------
@@ -33,6 +29,8 @@ st.set_page_config(page_title="UK Citizenship Absence Checker", page_icon="🇬
 # -------------------------
 # GLOBAL CSS
 # -------------------------
+# Must be emitted on every run: Streamlit drops elements a rerun doesn't
+# re-render, so gating this behind a session flag would lose the styles.
 st.markdown(
     """
     <style>
@@ -88,41 +86,60 @@ handle_oauth_callback()
 # -------------------------
 # SUPABASE CONNECTION (data)
 # -------------------------
-supabase = st.connection("supabase", type=SupabaseConnection)
+supabase = get_supabase()
 
 
 # -------------------------
 # Helper: friendlier auth errors
 # -------------------------
-def _friendly_auth_error(e: Exception) -> str:
-    msg_raw = str(e)
-    msg = msg_raw.lower()
-
-    # Cooldown like: "you can only request this after 17 seconds."
-    m = re.search(r"after\\s+(\\d+)\\s+seconds", msg)
-    if m:
-        secs = m.group(1)
-        return f"Please wait {secs} seconds and try again."
+# Cooldown like: "you can only request this after 17 seconds."
+_COOLDOWN_RE = re.compile(r"after\s+(\d+)\s+seconds")
 
+# (substrings, message), checked in order against the lowercased error.
+# A tuple of substrings matches only if all of them appear.
+_AUTH_ERROR_RULES = (
     # Weak password
-    if "password should be at least" in msg or "weakpassworderror" in msg:
-        return "Password is too short. It must be at least 6 characters."
-
+    (
+        ("password should be at least", "weakpassworderror"),
+        "Password is too short. It must be at least 6 characters.",
+    ),
     # Email already has an account
-    if "user already registered" in msg or "already been registered" in msg:
-        return "This email already has an account. Please sign in (or reset your password)."
-
+    (
+        ("user already registered", "already been registered"),
+        "This email already has an account. Please sign in (or reset your password).",
+    ),
     # Generic rate limit
-    if "rate limit" in msg or "too many requests" in msg or "429" in msg:
-        return "Too many attempts in a short time. Please wait a bit and try again."
-
+    (
+        ("rate limit", "too many requests", "429"),
+        "Too many attempts in a short time. Please wait a bit and try again.",
+    ),
     # Email not confirmed yet
-    if ("email not confirmed" in msg) or ("confirm" in msg and "email" in msg):
-        return "Please confirm your email first (check your inbox), then sign in."
-
+    (
+        ("email not confirmed", ("confirm", "email")),
+        "Please confirm your email first (check your inbox), then sign in.",
+    ),
     # Wrong email / password
-    if "invalid login credentials" in msg:
-        return "Incorrect email or password."
+    (
+        ("invalid login credentials",),
+        "Incorrect email or password.",
+    ),
+)
+
+
+def _friendly_auth_error(e: Exception) -> str:
+    msg = str(e).lower()
+
+    m = _COOLDOWN_RE.search(msg)
+    if m:
+        secs = m.group(1)
+        return f"Please wait {secs} seconds and try again."
+
+    for needles, friendly in _AUTH_ERROR_RULES:
+        if any(
+            n in msg if isinstance(n, str) else all(part in msg for part in n)
+            for n in needles
+        ):
+            return friendly
 
     # Fallback
     return "Something went wrong. Please try again."
@@ -256,62 +273,135 @@ It uses **whole days abroad** only — **departure and arrival days do *not* cou
 # -------------------------
 # LOAD TRIPS FROM DB
 # -------------------------
+def _set_trip_table(table):
+    # The trip list's selection is kept as row positions, which mean
+    # nothing once the table changes: start again with nothing selected
+    st.session_state.trip_table = table
+    st.session_state.pop("trip_list_view", None)
+
+
 def refresh_trips_from_db():
-    rows = fetch_trips(supabase, user_id=user.id)
-    st.session_state.trip_rows = [row_to_triprow(r) for r in rows]
+    rows = fetch_trips_cached(supabase, user_id=user.id)
+    _set_trip_table(rows_to_arrays(rows))
+
+
+def _remove_trips_locally(trip_ids):
+    _set_trip_table(st.session_state.trip_table.without(trip_ids))
+
+
+def _add_trip_locally(row: dict):
+    # Keeps the same order as fetch_trips: newest start date first
+    _set_trip_table(st.session_state.trip_table.with_row(row))
+
+
+def _trip_frame(table) -> pd.DataFrame:
+    """The trip list as shown on the page, one row per trip."""
+    return pd.DataFrame(
+        {
+            "#": range(1, len(table) + 1),
+            "Left the UK": table.start_labels,
+            "Returned": table.end_labels,
+            "Full days abroad": table.trips.full_absence_days(),
+            "Note": table.notes,
+        }
+    )
 
 
-if "trip_rows" not in st.session_state:
+_TRIPS_SENTINEL = object()
+
+if st.session_state.get("trip_table", _TRIPS_SENTINEL) is _TRIPS_SENTINEL:
     refresh_trips_from_db()
 
 
+# -------------------------
+# FLUSH QUEUED DELETES
+# -------------------------
+# Delete clicks only drop the row locally and queue its id; everything
+# queued goes to Supabase here, as one batched DELETE, on the next run.
+def _flush_pending_deletes():
+    pending = st.session_state.get("pending_deletes")
+    if not pending:
+        return
+    st.session_state.pending_deletes = []
+    try:
+        delete_trips(supabase, pending, user_id=user.id)
+    except Exception as e:
+        # The rows are already gone locally: re-read what the DB still holds
+        refresh_trips_from_db()
+        st.error("Could not delete the trip(s). Please try again.")
+        if SHOW_DEV_DETAILS:
+            with st.expander("Details (developer)"):
+                st.exception(e)
+
+
+st.session_state.setdefault("pending_deletes", [])
+_flush_pending_deletes()
+
+
 # -------------------------
 # DEV DEBUG (USER-SCOPED)
 # -------------------------
 if SHOW_DEV_DETAILS:
-    with st.expander("🐞 Developer debug: test Supabase connection"):
-        try:
-            rows = execute_query(
-                supabase.table("trips")
-                .select("*")
-                .eq("user_id", user.id)
-                .order("start_date", desc=True),
-                ttl="10m",
-            )
-            st.success("Connected to Supabase successfully 🎉")
-            st.write(rows)
-        except Exception as e:
-            st.error("Could not connect to Supabase.")
-            st.exception(e)
+    with st.expander("🐞 Developer debug: loaded trips"):
+        # Same rows as the list below - no second query to Supabase.
+        table = st.session_state.trip_table
+        st.dataframe(_trip_frame(table).assign(id=table.ids), hide_index=True)
+
+        # Live round-trip only on request, bypassing the fetch cache
+        if st.button("Probe Supabase now", key="dbg_probe"):
+            try:
+                rows = fetch_trips(supabase, user_id=user.id)
+                st.success(f"Connected to Supabase successfully 🎉 ({len(rows)} trips)")
+                st.write(rows)
+            except Exception as e:
+                st.error("Could not connect to Supabase.")
+                st.exception(e)
 
 
 # -------------------------
 # 1. SHOW SAVED TRIPS
 # -------------------------
-st.header("1. Your saved trips")
+# Fragments: selecting trips or changing 'today' reruns only that block.
+# Anything that changes the trip list calls st.rerun() for the whole app,
+# since the summary and earliest-date sections read the same trips.
+@st.fragment
+def _trip_list_fragment():
+    # Local state is kept in sync after each add/delete; this re-reads the DB.
+    # The reload itself happens on the full rerun, after current_user() has
+    # pointed the shared client at this session's token.
+    if st.button("Refresh", key="refresh_trips"):
+        bump_trips_version(user.id)
+        st.session_state.pop("trip_table", None)
+        st.session_state.pop("trip_list_view", None)
+        st.rerun()
+
+    table = st.session_state.trip_table
+    if not len(table):
+        st.info("No saved trips yet.")
+        return
+
+    # One table element for the whole list instead of a few widgets per trip
+    event = st.dataframe(
+        _trip_frame(table),
+        hide_index=True,
+        width="stretch",
+        on_select="rerun",
+        selection_mode="multi-row",
+        key="trip_list_view",
+    )
+    st.caption("Full days abroad are the days counted as absences. Select rows to delete them.")
+
+    # Selected positions index straight into the table's id column
+    rows = [r for r in event.selection.rows if r < len(table)]
+    selected_ids = table.ids[rows].tolist()
+    if selected_ids and st.button(f"Delete selected ({len(selected_ids)})", key="del_selected"):
+        _remove_trips_locally(selected_ids)
+        st.session_state.pending_deletes.extend(selected_ids)
+        st.rerun()
 
-if st.session_state.trip_rows:
-    for idx, triprow in enumerate(st.session_state.trip_rows, start=1):
-        t = triprow.trip
-        days = t.full_absence_days()
-
-        col_trip, col_btn = st.columns([6, 1])
-
-        with col_trip:
-            st.markdown(
-                f"**Trip {idx}:** {format_date_uk(t.start)} → {format_date_uk(t.end)}"
-            )
-            st.write(f"- Full days abroad counted as absences: **{days}**")
-            if t.note:
-                st.write(f"- Note: _{t.note}_")
-
-        with col_btn:
-            if st.button("Delete", key=f"del_{triprow.id}"):
-                delete_trip(supabase, triprow.id, user_id=user.id)
-                refresh_trips_from_db()
-                st.rerun()
-else:
-    st.info("No saved trips yet.")
+
+st.header("1. Your saved trips")
+_trip_list_fragment()
 
 
 # -------------------------
@@ -335,55 +425,90 @@ with st.form("add_trip_form"):
         if end < start:
             st.error("Return date cannot be before start date.")
         else:
-            insert_trip(
-                supabase,
-                start=start,
-                end=end,
-                note=note.strip(),
-                user_id=user.id,
-            )
-            refresh_trips_from_db()
-            st.success("Trip added.")
-            st.rerun()
+            try:
+                row = insert_trip(
+                    supabase,
+                    start=start,
+                    end=end,
+                    note=note.strip(),
+                    user_id=user.id,
+                )
+            except Exception as e:
+                st.error("Could not save the trip. Please try again.")
+                if SHOW_DEV_DETAILS:
+                    with st.expander("Details (developer)"):
+                        st.exception(e)
+            else:
+                if row:
+                    _add_trip_locally(row)
+                else:
+                    # Insert did not echo the row back: fall back to a full reload
+                    refresh_trips_from_db()
+                st.success("Trip added.")
+                st.rerun()
 
 
 # -------------------------
-# 3. ABSENCE SUMMARY
+# CALCULATOR RESULTS (MEMOIZED)
 # -------------------------
-st.header("3. Choose 'today' and see your current position")
+# TripTable is immutable and replaced on every add/delete/refresh, so the
+# table object itself is the trips "version": a result is reused for as long
+# as both the table and the date it was computed for are unchanged.
+def _memoized(state_key, fn, trips_table, today: date):
+    hit = st.session_state.get(state_key)
+    if hit and hit[0] is trips_table and hit[1] == today:
+        return hit[2]
+    result = fn(trips_table.trips, today)
+    st.session_state[state_key] = (trips_table, today, result)
+    return result
 
-today = st.date_input("Assume today's date is", value=date.today(), format="DD/MM/YYYY")
-st.caption(f"Using today as: {format_date_uk(today)}")
 
-trips_for_calc = [tr.trip for tr in st.session_state.trip_rows]
+# -------------------------
+# 3. ABSENCE SUMMARY + 4. EARLIEST ELIGIBLE DATE
+# -------------------------
+# One fragment for both sections: changing 'today' reruns only this block,
+# and an earliest-date result computed for the old date is cleared with it.
+@st.fragment
+def _today_fragment():
+    st.header("3. Choose 'today' and see your current position")
+
+    today = st.date_input(
+        "Assume today's date is", value=date.today(), format="DD/MM/YYYY", key="today"
+    )
+    st.caption(f"Using today as: {format_date_uk(today)}")
 
-if trips_for_calc:
-    summary = check_candidate_date(trips_for_calc, candidate_date=today)
-    st.write(f"- Last 12 months: **{summary.days_12_months}** / 90")
-    st.write(f"- Last 5 years: **{summary.days_5_years}** / 450")
-else:
-    st.info("Add trips to see your absence summary.")
+    table = st.session_state.trip_table
 
+    if len(table):
+        summary = _memoized("_summary_memo", check_candidate_date, table, today)
+        st.markdown(
+            f"- Last 12 months: **{summary.days_12_months}** / 90\n"
+            f"- Last 5 years: **{summary.days_5_years}** / 450"
+        )
+    else:
+        st.info("Add trips to see your absence summary.")
 
-# -------------------------
-# 4. EARLIEST ELIGIBLE DATE
-# -------------------------
-st.header("4. Calculate earliest eligible application date")
+    st.header("4. Calculate earliest eligible application date")
 
-if st.button("Calculate earliest eligible application date"):
-    result = find_earliest_application_date(trips_for_calc, today=today)
+    if not st.button("Calculate earliest eligible application date"):
+        return
+
+    result = _memoized("_earliest_memo", find_earliest_application_date, table, today)
 
     if not result:
         st.error("No eligible date found within the next 10 years.")
     else:
         st.success(f"### Earliest eligible date: **{format_date_uk(result.candidate_date)}**")
-        st.write(f"- Absences (12 months): **{result.days_12_months}**")
-        st.write(f"- Absences (5 years): **{result.days_5_years}**")
-        st.write(f"- Home Office presence test date: **{format_date_uk(result.presence_date_5y)}**")
-        st.write(
+        st.markdown(
+            f"- Absences (12 months): **{result.days_12_months}**\n"
+            f"- Absences (5 years): **{result.days_5_years}**\n"
+            f"- Home Office presence test date: **{format_date_uk(result.presence_date_5y)}**\n"
             f"- Present in UK on that date: **{'Yes' if result.present_on_presence_date else 'No'}**"
         )
 
+
+_today_fragment()
+
 st.markdown("---")
 st.caption(
     "This tool is for information only and does not constitute legal or immigration advice."